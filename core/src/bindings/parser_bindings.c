@@ -21,6 +21,7 @@
 /* ScopeMux header includes */
 #include "../../core/src/parser/cst_node.h"
 #include "../../include/scopemux/ast.h"
+#include "../../include/scopemux/logging.h"
 #include "../../include/scopemux/parser.h"
 #include "../../include/scopemux/python_bindings.h"
 #include "../../include/scopemux/python_utils.h"
@@ -247,62 +248,195 @@ static PyObject *ParserContext_get_ast_root(PyObject *self_obj, PyObject *Py_UNU
   return (PyObject *)py_node;
 }
 
+/*
+ * Keys shared by every dictionary built from a CST node. They are interned
+ * once, because PyDict_SetItemString would allocate a new key string for
+ * every field of every node.
+ */
+static PyObject *cst_key_type = NULL;
+static PyObject *cst_key_content = NULL;
+static PyObject *cst_key_range = NULL;
+static PyObject *cst_key_children = NULL;
+static PyObject *cst_key_start = NULL;
+static PyObject *cst_key_end = NULL;
+static PyObject *cst_key_line = NULL;
+static PyObject *cst_key_column = NULL;
+
 /**
- * @brief Convert a CSTNode to a Python dictionary directly
- * This creates a complete deep copy of the CST node structure without maintaining
- * any references to the original C structures, avoiding memory management issues.
+ * @brief Create the interned CST dictionary keys on first use
+ * @return 0 on success, -1 with a Python exception set on failure
  */
-static PyObject *cst_node_to_py_dict(const CSTNode *node) {
-  if (!node) {
-    Py_RETURN_NONE;
+static int init_cst_keys(void) {
+  if (cst_key_column) {
+    return 0;
   }
 
-  printf("[PYTHON] Converting CST node at %p (type=%s) to Python dictionary\n", (void *)node,
-         node->type);
-  fflush(stdout);
+  cst_key_type = PyUnicode_InternFromString("type");
+  cst_key_content = PyUnicode_InternFromString("content");
+  cst_key_range = PyUnicode_InternFromString("range");
+  cst_key_children = PyUnicode_InternFromString("children");
+  cst_key_start = PyUnicode_InternFromString("start");
+  cst_key_end = PyUnicode_InternFromString("end");
+  cst_key_line = PyUnicode_InternFromString("line");
+  // Created last: a non-NULL column key marks the whole set as ready
+  cst_key_column = PyUnicode_InternFromString("column");
+
+  if (!cst_key_type || !cst_key_content || !cst_key_range || !cst_key_children ||
+      !cst_key_start || !cst_key_end || !cst_key_line || !cst_key_column) {
+    Py_CLEAR(cst_key_type);
+    Py_CLEAR(cst_key_content);
+    Py_CLEAR(cst_key_range);
+    Py_CLEAR(cst_key_children);
+    Py_CLEAR(cst_key_start);
+    Py_CLEAR(cst_key_end);
+    Py_CLEAR(cst_key_line);
+    Py_CLEAR(cst_key_column);
+    return -1;
+  }
+  return 0;
+}
 
-  // Create a new dictionary to hold the node data
-  PyObject *dict = PyDict_New();
-  if (!dict) {
+/**
+ * @brief Convert a SourceLocation to a {"line", "column"} Python dictionary
+ */
+static PyObject *source_location_to_py_dict(const SourceLocation *loc) {
+  PyObject *loc_dict = PyDict_New();
+  if (!loc_dict) {
     return NULL;
   }
 
-  // Create a new dictionary subclass that adds the required methods
-  PyObject *types_module = PyImport_ImportModule("types");
-  if (!types_module) {
-    Py_DECREF(dict);
+  PyObject *line = PyLong_FromLong(loc->line);
+  PyObject *column = PyLong_FromLong(loc->column);
+  if (!line || !column || PyDict_SetItem(loc_dict, cst_key_line, line) < 0 ||
+      PyDict_SetItem(loc_dict, cst_key_column, column) < 0) {
+    Py_XDECREF(line);
+    Py_XDECREF(column);
+    Py_DECREF(loc_dict);
     return NULL;
   }
+  Py_DECREF(line);
+  Py_DECREF(column);
 
-  // Create a new type with methods
-  PyObject *type_dict = PyDict_New();
-  if (!type_dict) {
-    Py_DECREF(types_module);
-    Py_DECREF(dict);
+  return loc_dict;
+}
+
+/**
+ * @brief Convert a SourceRange to a {"start", "end"} Python dictionary
+ * Shared by the CST dictionary conversion and the CSTNode range getter.
+ */
+static PyObject *source_range_to_py_dict(const SourceRange *range) {
+  PyObject *range_dict = PyDict_New();
+  if (!range_dict) {
+    return NULL;
+  }
+
+  PyObject *start_dict = source_location_to_py_dict(&range->start);
+  PyObject *end_dict = source_location_to_py_dict(&range->end);
+  if (!start_dict || !end_dict || PyDict_SetItem(range_dict, cst_key_start, start_dict) < 0 ||
+      PyDict_SetItem(range_dict, cst_key_end, end_dict) < 0) {
+    Py_XDECREF(start_dict);
+    Py_XDECREF(end_dict);
+    Py_DECREF(range_dict);
+    return NULL;
+  }
+  Py_DECREF(start_dict);
+  Py_DECREF(end_dict);
+
+  return range_dict;
+}
+
+/*
+ * Node type names come from the grammar, so a tree uses at most a few hundred
+ * distinct type strings. Within one conversion they are cached by pointer,
+ * which skips the UTF-8 decode and string allocation for every repeated type
+ * and lets all nodes of a type share one str object. Pointer keys are safe
+ * because the tree, and therefore every type string it references, stays
+ * alive and unchanged for the whole conversion.
+ */
+#define CST_TYPE_CACHE_SIZE 512 /* Power of two */
+#define CST_TYPE_CACHE_PROBES 16
+
+typedef struct {
+  const char *keys[CST_TYPE_CACHE_SIZE];
+  PyObject *values[CST_TYPE_CACHE_SIZE];
+} CSTTypeCache;
+
+/**
+ * @brief Look up (or create and cache) the Python string for a node type
+ * @return New reference, or NULL with an exception set
+ */
+static PyObject *cst_type_cache_get(CSTTypeCache *cache, const char *type) {
+  size_t slot = ((uintptr_t)type >> 3) & (CST_TYPE_CACHE_SIZE - 1);
+  for (size_t probe = 0; probe < CST_TYPE_CACHE_PROBES; probe++) {
+    if (cache->keys[slot] == type) {
+      Py_INCREF(cache->values[slot]);
+      return cache->values[slot];
+    }
+    if (!cache->keys[slot]) {
+      PyObject *type_str = PyUnicode_InternFromString(type);
+      if (!type_str) {
+        return NULL;
+      }
+      cache->keys[slot] = type;
+      cache->values[slot] = type_str;
+      Py_INCREF(type_str);
+      return type_str;
+    }
+    slot = (slot + 1) & (CST_TYPE_CACHE_SIZE - 1);
+  }
+
+  // Crowded neighbourhood; this type just goes without sharing
+  return PyUnicode_FromString(type);
+}
+
+/**
+ * @brief Release the strings held by a type cache
+ */
+static void cst_type_cache_clear(CSTTypeCache *cache) {
+  for (size_t i = 0; i < CST_TYPE_CACHE_SIZE; i++) {
+    Py_CLEAR(cache->values[i]);
+    cache->keys[i] = NULL;
+  }
+}
+
+/**
+ * @brief Build the dictionary for a single CST node, without its children
+ * The "children" entry is a list sized to the node's child count whose slots
+ * are still empty (NULL); cst_node_to_py_dict fills them in.
+ *
+ * @param node Node to convert (must not be NULL)
+ * @param type_cache Type strings shared across the current conversion
+ * @param children_out Receives a borrowed reference to the node's children list
+ * @return New reference to the node dictionary, or NULL with an exception set
+ */
+static PyObject *cst_node_shell_to_py_dict(const CSTNode *node, CSTTypeCache *type_cache,
+                                           PyObject **children_out) {
+  log_debug("Converting CST node at %p (type=%s) to Python dictionary", (void *)node,
+            SAFE_STR(node->type));
+
+  // Create a new dictionary to hold the node data
+  PyObject *dict = PyDict_New();
+  if (!dict) {
     return NULL;
   }
 
   // Add basic data
-  PyObject *type_str =
-      node->type ? PyUnicode_FromString(node->type) : PyUnicode_FromString("UNKNOWN");
+  PyObject *type_str = node->type ? cst_type_cache_get(type_cache, node->type)
+                                  : PyUnicode_FromString("UNKNOWN");
   PyObject *content_str =
       node->content ? PyUnicode_FromString(node->content) : PyUnicode_FromString("");
 
   if (!type_str || !content_str) {
     Py_XDECREF(type_str);
     Py_XDECREF(content_str);
-    Py_DECREF(type_dict);
-    Py_DECREF(types_module);
     Py_DECREF(dict);
     return NULL;
   }
 
-  if (PyDict_SetItemString(dict, "type", type_str) < 0 ||
-      PyDict_SetItemString(dict, "content", content_str) < 0) {
+  if (PyDict_SetItem(dict, cst_key_type, type_str) < 0 ||
+      PyDict_SetItem(dict, cst_key_content, content_str) < 0) {
     Py_DECREF(type_str);
     Py_DECREF(content_str);
-    Py_DECREF(type_dict);
-    Py_DECREF(types_module);
     Py_DECREF(dict);
     return NULL;
   }
@@ -310,143 +444,140 @@ static PyObject *cst_node_to_py_dict(const CSTNode *node) {
   Py_DECREF(content_str);
 
   // Add range information
-  PyObject *range_dict = PyDict_New();
+  PyObject *range_dict = source_range_to_py_dict(&node->range);
   if (!range_dict) {
-    Py_DECREF(type_dict);
-    Py_DECREF(types_module);
     Py_DECREF(dict);
     return NULL;
   }
 
-  PyObject *start_dict = PyDict_New();
-  PyObject *end_dict = PyDict_New();
-  if (!start_dict || !end_dict) {
-    Py_XDECREF(start_dict);
-    Py_XDECREF(end_dict);
+  // Add range to main dict
+  if (PyDict_SetItem(dict, cst_key_range, range_dict) < 0) {
     Py_DECREF(range_dict);
-    Py_DECREF(type_dict);
-    Py_DECREF(types_module);
     Py_DECREF(dict);
     return NULL;
   }
+  Py_DECREF(range_dict);
 
-  // Add start position
-  PyObject *start_line = PyLong_FromLong(node->range.start.line);
-  PyObject *start_column = PyLong_FromLong(node->range.start.column);
-  if (!start_line || !start_column || PyDict_SetItemString(start_dict, "line", start_line) < 0 ||
-      PyDict_SetItemString(start_dict, "column", start_column) < 0) {
-    Py_XDECREF(start_line);
-    Py_XDECREF(start_column);
-    Py_DECREF(start_dict);
-    Py_DECREF(end_dict);
-    Py_DECREF(range_dict);
-    Py_DECREF(type_dict);
-    Py_DECREF(types_module);
+  // Add children. The list is sized up front, so leaves allocate no item
+  // storage and inner nodes never grow the list while it is filled. Unfilled
+  // slots stay NULL, which list deallocation tolerates on error paths.
+  PyObject *children = PyList_New((Py_ssize_t)node->children_count);
+  if (!children) {
     Py_DECREF(dict);
     return NULL;
   }
-  Py_DECREF(start_line);
-  Py_DECREF(start_column);
-
-  // Add end position
-  PyObject *end_line = PyLong_FromLong(node->range.end.line);
-  PyObject *end_column = PyLong_FromLong(node->range.end.column);
-  if (!end_line || !end_column || PyDict_SetItemString(end_dict, "line", end_line) < 0 ||
-      PyDict_SetItemString(end_dict, "column", end_column) < 0) {
-    Py_XDECREF(end_line);
-    Py_XDECREF(end_column);
-    Py_DECREF(start_dict);
-    Py_DECREF(end_dict);
-    Py_DECREF(range_dict);
-    Py_DECREF(type_dict);
-    Py_DECREF(types_module);
+
+  if (PyDict_SetItem(dict, cst_key_children, children) < 0) {
+    Py_DECREF(children);
     Py_DECREF(dict);
     return NULL;
   }
-  Py_DECREF(end_line);
-  Py_DECREF(end_column);
+  Py_DECREF(children);
 
-  // Set start and end in range_dict
-  if (PyDict_SetItemString(range_dict, "start", start_dict) < 0 ||
-      PyDict_SetItemString(range_dict, "end", end_dict) < 0) {
-    Py_DECREF(start_dict);
-    Py_DECREF(end_dict);
-    Py_DECREF(range_dict);
-    Py_DECREF(type_dict);
-    Py_DECREF(types_module);
-    Py_DECREF(dict);
-    return NULL;
+  // Removed redundant 'get_*' fields from CST serialization for output size sanity.
+
+  *children_out = children;
+  return dict;
+}
+
+/**
+ * @brief A node whose children are still being converted
+ */
+typedef struct {
+  const CSTNode *node;  /**< Node being expanded */
+  PyObject *children;   /**< Borrowed: the node's children list */
+  unsigned int next;    /**< Index of the next child to convert */
+} CSTConvertFrame;
+
+/**
+ * @brief Convert a CSTNode to a Python dictionary directly
+ * This creates a complete deep copy of the CST node structure without maintaining
+ * any references to the original C structures, avoiding memory management issues.
+ *
+ * The tree is walked with an explicit, heap-allocated stack rather than by
+ * recursion, so deeply nested sources cannot exhaust the C stack.
+ */
+static PyObject *cst_node_to_py_dict(const CSTNode *node) {
+  if (!node) {
+    Py_RETURN_NONE;
   }
-  Py_DECREF(start_dict);
-  Py_DECREF(end_dict);
 
-  // Add range to main dict
-  if (PyDict_SetItemString(dict, "range", range_dict) < 0) {
-    Py_DECREF(range_dict);
-    Py_DECREF(type_dict);
-    Py_DECREF(types_module);
-    Py_DECREF(dict);
-    return NULL;
+  CSTTypeCache *type_cache = PyMem_Calloc(1, sizeof(*type_cache));
+  if (!type_cache) {
+    return PyErr_NoMemory();
   }
-  Py_DECREF(range_dict);
 
-  // Add children
-  PyObject *children = PyList_New(0);
-  if (!children) {
-    Py_DECREF(type_dict);
-    Py_DECREF(types_module);
-    Py_DECREF(dict);
+  PyObject *children = NULL;
+  PyObject *root_dict = cst_node_shell_to_py_dict(node, type_cache, &children);
+  if (!root_dict) {
+    cst_type_cache_clear(type_cache);
+    PyMem_Free(type_cache);
     return NULL;
   }
 
-  // Process children recursively
-  for (unsigned int i = 0; i < node->children_count; i++) {
-    PyObject *child_dict = cst_node_to_py_dict(node->children[i]);
-    if (!child_dict) {
-      Py_DECREF(children);
-      Py_DECREF(type_dict);
-      Py_DECREF(types_module);
-      Py_DECREF(dict);
-      return NULL;
-    }
+  size_t capacity = 64;
+  size_t depth = 0;
+  CSTConvertFrame *stack = PyMem_Malloc(capacity * sizeof(*stack));
+  if (!stack) {
+    cst_type_cache_clear(type_cache);
+    PyMem_Free(type_cache);
+    Py_DECREF(root_dict);
+    return PyErr_NoMemory();
+  }
+  stack[depth++] = (CSTConvertFrame){node, children, 0};
 
-    if (PyList_Append(children, child_dict) < 0) {
-      Py_DECREF(child_dict);
-      Py_DECREF(children);
-      Py_DECREF(type_dict);
-      Py_DECREF(types_module);
-      Py_DECREF(dict);
-      return NULL;
+  while (depth > 0) {
+    CSTConvertFrame *top = &stack[depth - 1];
+    if (top->next >= top->node->children_count) {
+      depth--;
+      continue;
     }
-    Py_DECREF(child_dict);
-  }
 
-  if (PyDict_SetItemString(dict, "children", children) < 0) {
-    Py_DECREF(children);
-    Py_DECREF(type_dict);
-    Py_DECREF(types_module);
-    Py_DECREF(dict);
-    return NULL;
-  }
-  Py_DECREF(children);
+    unsigned int index = top->next++;
+    const CSTNode *child = top->node->children[index];
 
-  // Add method implementations directly to the dictionary
-  PyObject *methods = PyDict_New();
-  if (!methods) {
-    Py_DECREF(type_dict);
-    Py_DECREF(types_module);
-    Py_DECREF(dict);
-    return NULL;
-  }
+    PyObject *child_dict;
+    PyObject *child_children = NULL;
+    if (child) {
+      child_dict = cst_node_shell_to_py_dict(child, type_cache, &child_children);
+      if (!child_dict) {
+        goto error;
+      }
+    } else {
+      // Missing children are represented as None, as before
+      child_dict = Py_None;
+      Py_INCREF(child_dict);
+    }
 
-  // Removed redundant 'get_*' fields from CST serialization for output size sanity.
+    // PyList_SET_ITEM steals the reference to child_dict
+    PyList_SET_ITEM(top->children, index, child_dict);
 
-  // Clean up
-  Py_DECREF(methods);
-  Py_DECREF(type_dict);
-  Py_DECREF(types_module);
+    if (child && child->children_count > 0) {
+      if (depth == capacity) {
+        CSTConvertFrame *grown = PyMem_Realloc(stack, capacity * 2 * sizeof(*stack));
+        if (!grown) {
+          PyErr_NoMemory();
+          goto error;
+        }
+        stack = grown;
+        capacity *= 2;
+      }
+      stack[depth++] = (CSTConvertFrame){child, child_children, 0};
+    }
+  }
 
-  return dict;
+  PyMem_Free(stack);
+  cst_type_cache_clear(type_cache);
+  PyMem_Free(type_cache);
+  return root_dict;
+
+error:
+  // Partially filled children lists are released along with the root
+  PyMem_Free(stack);
+  cst_type_cache_clear(type_cache);
+  PyMem_Free(type_cache);
+  Py_DECREF(root_dict);
+  return NULL;
 }
 
 /**
@@ -470,6 +601,10 @@ static PyObject *ParserContext_get_cst_root(PyObject *self_obj, PyObject *Py_UNU
     return NULL;
   }
 
+  if (init_cst_keys() < 0) {
+    return NULL;
+  }
+
   // Create a pure Python dictionary directly from the CST node
   // This creates a deep copy without maintaining references to C structures
   PyObject *py_dict = cst_node_to_py_dict(cst_root_const);
@@ -780,25 +915,10 @@ static PyObject *CSTNode_get_range(CSTNodeObject *self, void *closure) {
     Py_RETURN_NONE;
   }
 
-  // Create range dictionary with start and end positions
-  PyObject *range_dict = PyDict_New();
-  PyObject *start_dict = PyDict_New();
-  PyObject *end_dict = PyDict_New();
-
-  PyDict_SetItemString(start_dict, "line", PyLong_FromLong(self->node->range.start.line));
-  PyDict_SetItemString(start_dict, "column", PyLong_FromLong(self->node->range.start.column));
-
-  PyDict_SetItemString(end_dict, "line", PyLong_FromLong(self->node->range.end.line));
-  PyDict_SetItemString(end_dict, "column", PyLong_FromLong(self->node->range.end.column));
-
-  PyDict_SetItemString(range_dict, "start", start_dict);
-  PyDict_SetItemString(range_dict, "end", end_dict);
-
-  // Clean up references
-  Py_DECREF(start_dict);
-  Py_DECREF(end_dict);
-
-  return range_dict;
+  if (init_cst_keys() < 0) {
+    return NULL;
+  }
+  return source_range_to_py_dict(&self->node->range);
 }
 
 static PyObject *CSTNode_get_children(CSTNodeObject *self, void *closure) {
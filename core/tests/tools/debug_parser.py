@@ -5,8 +5,7 @@ Debug script for ScopeMux parser segmentation fault
 
 import sys
 import os
-import gc
-import signal
+import faulthandler
 import traceback
 import logging
 
@@ -19,15 +18,8 @@ logging.basicConfig(level=logging.DEBUG,
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 sys.path.insert(0, project_root)
 
-# Define segfault handler
-def segfault_handler(signum, frame):
-    logging.error("SEGMENTATION FAULT DETECTED")
-    logging.error("Current stack trace:")
-    traceback.print_stack(frame)
-    sys.exit(1)
-
-# Register signal handler for SIGSEGV
-signal.signal(signal.SIGSEGV, segfault_handler)
+# Report segfaults in the extension with a Python traceback of every thread
+faulthandler.enable(all_threads=True)
 
 try:
     logging.info("Attempting to import scopemux_core module...")
@@ -62,7 +54,7 @@ try:
     """
     
     logging.info("Step 2: Setting language to C...")
-    scopemux_core.parser_set_language(ctx, 1)  # 1 = C
+    scopemux_core.parser_set_language(ctx, scopemux_core.LANG_C)
     
     logging.info("Step 3: Parsing string...")
     try:
@@ -5,8 +5,7 @@ Debug script for ScopeMux parser segmentation fault
 
 import sys
 import os
-import gc
-import signal
+import faulthandler
 import traceback
 import logging
 import ctypes
@@ -20,15 +19,10 @@ logging.basicConfig(level=logging.DEBUG,
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 sys.path.insert(0, project_root)
 
-# Define segfault handler
-def segfault_handler(signum, frame):
-    logging.error("SEGMENTATION FAULT DETECTED")
-    logging.error("Current stack trace:")
-    traceback.print_stack(frame)
-    sys.exit(1)
-
-# Register signal handler for SIGSEGV
-signal.signal(signal.SIGSEGV, segfault_handler)
+# Dump the Python stack on SIGSEGV from faulthandler's C-level handler. A
+# signal.signal() handler only runs between bytecodes, which never happens
+# once the fault is inside the extension.
+faulthandler.enable(all_threads=True)
 
 try:
     logging.info("Attempting to import scopemux_core module...")
@@ -53,9 +47,6 @@ try:
     # Try to parse the C code step by step
     logging.info("Attempting to parse C code...")
     try:
-        # Force garbage collection before parsing
-        gc.collect()
-        
         # Use C language directly instead of detection
         lang_str = "c"
         logging.info(f"Using language string: {lang_str}")
@@ -92,7 +83,6 @@ try:
     # Clean up
     logging.info("Cleaning up parser context...")
     del ctx
-    gc.collect()
     logging.info("Parser context cleaned up")
     
 except Exception as e:
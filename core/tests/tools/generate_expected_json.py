@@ -15,25 +15,47 @@ Options:
     --update            Update existing .expected.json files instead of creating new ones
     --review            Print diff before updating (implies --update)
     --dry-run           Do not write files, just print what would be done
+    --incremental       Skip sources whose stamp shows they are unchanged since the last run
+                        (changing --mode for files without a stamp needs --force)
+    --force             Regenerate every file, ignoring --incremental skip checks
+    --jobs N            Worker processes for directory runs (0 = one per CPU, default: 1)
+    --fail-fast         Stop a directory run at the first file that fails
     --verbose           Print detailed information during processing
 """
 
-from pathlib import Path
+from pathlib import Path, PurePath
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import difflib
-import glob
+import functools
+import itertools
 import argparse
 import json
 import sys
 import os
-import gc
-import signal
+import stat
+import faulthandler
+import hashlib
 
-# Print debugging information about the Python environment
-print("DEBUG: Python sys.path:")
-for i, path in enumerate(sys.path):
-    print(f"  [{i}] {path}")
-print(f"DEBUG: PYTHONPATH = {os.environ.get('PYTHONPATH', '')}")
-print(f"DEBUG: LD_LIBRARY_PATH = {os.environ.get('LD_LIBRARY_PATH', '')}")
+# blake3 is optional; it hashes considerably faster than sha256 when installed
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+# orjson is optional too; it encodes straight to UTF-8 bytes in native code
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Print debugging information about the Python environment when asked to;
+# set SCOPEMUX_DEBUG_IMPORT=1 to diagnose which scopemux_core gets loaded
+if os.environ.get("SCOPEMUX_DEBUG_IMPORT"):
+    print("DEBUG: Python sys.path:")
+    for i, path in enumerate(sys.path):
+        print(f"  [{i}] {path}")
+    print(f"DEBUG: PYTHONPATH = {os.environ.get('PYTHONPATH', '')}")
+    print(f"DEBUG: LD_LIBRARY_PATH = {os.environ.get('LD_LIBRARY_PATH', '')}")
 
 # Set up Python path to find the core module - ensure build/core is first
 project_root = os.path.abspath(os.path.join(
@@ -45,15 +67,9 @@ if core_build_path in sys.path:
     sys.path.remove(core_build_path)
 sys.path.insert(0, core_build_path)
 
-
-# Define a dummy segfault handler that can be used in case the real one isn't available
-def dummy_segfault_handler(signum, frame):
-    print("Warning: Using dummy segfault handler")
-    raise RuntimeError("Segmentation fault detected (dummy handler)")
-
-
-# Register the dummy handler
-signal.signal(signal.SIGSEGV, dummy_segfault_handler)
+# Install a C-level SIGSEGV handler that prints the Python stack. Unlike a
+# signal.signal() handler, it still fires when the crash is inside scopemux_core.
+faulthandler.enable(all_threads=True)
 
 # Import the scopemux_core module
 try:
@@ -71,11 +87,52 @@ try:
     print(f"Found segfault_handler in {scopemux_core.__file__}")
 except AttributeError:
     print(
-        "Warning: scopemux_core.register_segfault_handler not found, using dummy handler"
+        "Warning: scopemux_core.register_segfault_handler not found, relying on faulthandler"
     )
     def segfault_handler(): return None
 
-# Rest of the imports
+
+def _resolve_language(name):
+    """Look up a language constant as Language.<name> or LANG_<name>.
+
+    The bindings have exposed both spellings over time; resolving here once
+    keeps that fallback out of the per-file path.
+    """
+    language_enum = getattr(scopemux_core, "Language", None)
+    value = getattr(language_enum, name, None)
+    if value is None:
+        value = getattr(scopemux_core, f"LANG_{name}")
+    return value
+
+
+_LANG_C = _resolve_language("C")
+_LANG_CPP = _resolve_language("CPP")
+_LANG_PYTHON = _resolve_language("PYTHON")
+_LANG_JAVASCRIPT = _resolve_language("JAVASCRIPT")
+_LANG_TYPESCRIPT = _resolve_language("TYPESCRIPT")
+
+# Map supported file extensions to parser languages, resolved once at import
+_EXT_TO_LANG = {
+    ".c": _LANG_C,
+    ".h": _LANG_C,
+    ".cpp": _LANG_CPP,
+    ".hpp": _LANG_CPP,
+    ".py": _LANG_PYTHON,
+    ".js": _LANG_JAVASCRIPT,
+    ".ts": _LANG_TYPESCRIPT,
+}
+
+# The same extensions as a tuple, so str.endswith can test them all in one call
+_SOURCE_EXTENSIONS = tuple(_EXT_TO_LANG)
+
+# Display names written to the "language" field of the combined output
+_LANG_TO_NAME = {
+    _LANG_C: "C",
+    _LANG_CPP: "C++",
+    _LANG_PYTHON: "Python",
+    _LANG_JAVASCRIPT: "JavaScript",
+    _LANG_TYPESCRIPT: "TypeScript",
+}
 
 
 def main():
@@ -107,6 +164,31 @@ def main():
         action="store_true",
         help="Do not write files, just print what would be done",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "Skip sources whose .stamp sidecar shows they are unchanged since the last run; "
+            "expected files without a stamp are compared by mtime, so changing --mode "
+            "for them needs --force"
+        ),
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Regenerate every file, ignoring --incremental skip checks",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for directory runs (0 = one per CPU, default: 1)",
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Stop a directory run at the first file that fails",
+    )
     parser.add_argument(
         "--verbose",
         action="store_true",
@@ -122,23 +204,143 @@ def main():
     # Register the segfault handler
     segfault_handler()
 
-    # Process the source path
+    # Process the source path. Outputs written under --output-dir mirror each
+    # source's location relative to source_root.
     source_path = os.path.abspath(args.source_path)
+    if args.output_dir:
+        args.output_dir = os.path.abspath(args.output_dir)
+    args.source_root = (
+        source_path if os.path.isdir(source_path) else os.path.dirname(source_path))
     if os.path.isdir(source_path):
         print(f"Processing directory: {args.source_path}")
-        process_directory(source_path, args)
+        failed = process_directory(source_path, args)
     else:
         print(f"Processing file: {args.source_path}")
-        process_file(source_path, args)
+        failed = 0 if process_file(source_path, args) else 1
+
+    # A non-zero exit status lets scripts notice files that did not parse
+    return 1 if failed else 0
+
+
+def iter_source_files(directory):
+    """Yield the paths of supported source files below directory.
+
+    Hidden files and directories are skipped and symlinked directories are
+    not followed, matching the os.walk() loop this replaces. Files are
+    yielded in the same top-down order. The walk uses os.scandir() directly,
+    so file types come from the cached directory entries and no per-directory
+    name lists are built. Extensions match case-sensitively, like the original
+    glob patterns, so a ".C" file (often C++) is not picked up as C.
+    """
+    pending = [directory]
+    while pending:
+        current = pending.pop()
+        subdirs = []
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif name.endswith(_SOURCE_EXTENSIONS) and entry.is_file():
+                        yield entry.path
+        except OSError:
+            # Unreadable directories are skipped, as os.walk() did by default
+            continue
+        pending.extend(reversed(subdirs))
+
+
+# ParserContext owned by a --jobs worker process, reused for every file it handles
+_WORKER_CTX = None
+
+
+def _init_worker():
+    global _WORKER_CTX
+    _WORKER_CTX = scopemux_core.ParserContext()
+
+
+def _process_in_worker(file_path, args):
+    return process_file(file_path, args, _WORKER_CTX)
 
 
 def process_directory(directory, args):
-    # Process all supported file types in the directory
-    for ext in [".c", ".h", ".cpp", ".hpp", ".py", ".js", ".ts"]:
-        for file_path in glob.glob(
-            os.path.join(directory, f"**/*{ext}"), recursive=True
-        ):
-            process_file(file_path, args)
+    """Process every supported source file under directory.
+
+    Returns the number of files that failed to parse or extract.
+    """
+    file_paths = list(iter_source_files(directory))
+
+    jobs = args.jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(file_paths) <= 1:
+        # One context serves the whole walk; parse_string clears the previous
+        # file's trees before parsing the next
+        ctx = scopemux_core.ParserContext()
+        results = []
+        for file_path in file_paths:
+            ok = process_file(file_path, args, ctx)
+            results.append((file_path, ok))
+            if args.fail_fast and not ok:
+                break
+    else:
+        # Files are independent: each worker parses with its own ParserContext
+        # and writes its own output file, so only a success flag comes back
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as executor:
+            if args.fail_fast:
+                # One future per file, so that after a failure the queued
+                # files can be cancelled and every file that did run is
+                # still reported
+                futures = {
+                    executor.submit(_process_in_worker, file_path, args): file_path
+                    for file_path in file_paths
+                }
+                for future in as_completed(futures):
+                    if not future.result():
+                        executor.shutdown(wait=True, cancel_futures=True)
+                        break
+                results = [
+                    (file_path, future.result())
+                    for future, file_path in futures.items()
+                    if not future.cancelled()
+                ]
+            else:
+                results = list(zip(file_paths, executor.map(
+                    _process_in_worker, file_paths, itertools.repeat(args), chunksize=4)))
+
+    # Per-file errors from parallel workers interleave on stdout, so the
+    # failing paths are listed again once every result is in
+    failed_paths = [file_path for file_path, ok in results if not ok]
+    print(f"Processed {len(results)} files, {len(failed_paths)} failed")
+    for file_path in failed_paths:
+        print(f"  FAILED: {file_path}")
+    return len(failed_paths)
+
+
+# Output keys of a serialized AST node, the getter that provides each one, and
+# whether the value comes from a small vocabulary worth interning
+_AST_NODE_FIELDS = (
+    ("type", "get_type", True),
+    ("name", "get_name", False),
+    ("qualified_name", "get_qualified_name", False),
+    ("signature", "get_signature", False),
+    ("docstring", "get_docstring", False),
+)
+
+# Getters resolved per node class, so attributes are probed once per type
+# rather than with a hasattr() call per field on every node
+_AST_GETTER_CACHE = {}
+
+
+def _ast_getters(node_type):
+    getters = _AST_GETTER_CACHE.get(node_type)
+    if getters is None:
+        getters = tuple(
+            (key, getattr(node_type, method, None), intern)
+            for key, method, intern in _AST_NODE_FIELDS
+        )
+        _AST_GETTER_CACHE[node_type] = getters
+    return getters
 
 
 def serialize_ast_node_to_dict(ast_node):
@@ -147,174 +349,494 @@ def serialize_ast_node_to_dict(ast_node):
         return None
 
     try:
-        node_dict = {
-            "type": ast_node.get_type() if hasattr(ast_node, 'get_type') else None,
-            "name": ast_node.get_name() if hasattr(ast_node, 'get_name') else None,
-            "qualified_name": ast_node.get_qualified_name() if hasattr(ast_node, 'get_qualified_name') else None,
-            "signature": ast_node.get_signature() if hasattr(ast_node, 'get_signature') else None,
-            "docstring": ast_node.get_docstring() if hasattr(ast_node, 'get_docstring') else None,
-        }
-
-        # Remove None values to keep the output clean
-        return {k: v for k, v in node_dict.items() if v is not None}
+        # None values are left out to keep the output clean
+        node_dict = {}
+        for key, getter, intern in _ast_getters(type(ast_node)):
+            if getter is not None:
+                value = getter(ast_node)
+                if value is not None:
+                    # Node type names repeat across every file; share one
+                    # string object per distinct name
+                    node_dict[key] = sys.intern(value) if intern else value
+        return node_dict
     except Exception as e:
         print(f"Error serializing AST node: {e}")
         return None
 
 
-def process_file(file_path, args):
-    # Determine the language based on file extension
-    ext = os.path.splitext(file_path)[1].lower()
-    language = None
-
-    if ext in [".c", ".h"]:
-        language = scopemux_core.LANG_C
-    elif ext in [".cpp", ".hpp"]:
-        language = scopemux_core.LANG_CPP
-    elif ext == ".py":
-        language = scopemux_core.LANG_PYTHON
-    elif ext == ".js":
-        language = scopemux_core.LANG_JAVASCRIPT
-    elif ext == ".ts":
-        language = scopemux_core.LANG_TYPESCRIPT
+def _passthrough(root):
+    return root
+
+
+def _stat_core_module():
+    """Stat the loaded scopemux_core extension file, or return None."""
+    try:
+        return os.stat(scopemux_core.__file__)
+    except (AttributeError, TypeError, OSError):
+        return None
+
+
+_CORE_STAT = _stat_core_module()
+
+
+def _core_build_id():
+    """Identify the loaded scopemux_core build for stamps.
+
+    __version__ is hardcoded in module.c and survives a rebuild unchanged, so
+    the extension file's mtime and size are recorded alongside it.
+    """
+    version = getattr(scopemux_core, "__version__", None)
+    if _CORE_STAT is None:
+        return version
+    return f"{version}+{_CORE_STAT.st_mtime_ns}.{_CORE_STAT.st_size}"
+
+
+# Recorded in stamps so that a rebuilt extension invalidates them
+_CORE_VERSION = _core_build_id()
+
+# ParserContext capabilities, probed once instead of per file
+_HAS_CST_ROOT = hasattr(scopemux_core.ParserContext, "get_cst_root")
+_HAS_CTX_LANGUAGE = hasattr(scopemux_core.ParserContext, "language")
+
+
+@functools.lru_cache(maxsize=None)
+def extractors_for_mode(mode):
+    """Return (key, root getter, serializer) triples for the roots a mode needs."""
+    extractors = []
+    if mode in ("ast", "both"):
+        extractors.append(
+            ("ast", scopemux_core.ParserContext.get_ast_root, serialize_ast_node_to_dict))
+    if mode in ("cst", "both"):
+        if _HAS_CST_ROOT:
+            # get_cst_root already returns a dictionary
+            extractors.append(
+                ("cst", scopemux_core.ParserContext.get_cst_root, _passthrough))
+        else:
+            print("Warning: get_cst_root() not available in scopemux_core.ParserContext")
+    return tuple(extractors)
+
+
+def read_stamp(output_path):
+    """Load the stamp sidecar written next to an expected JSON file, if any."""
+    try:
+        with open(f"{output_path}.stamp", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_stamp(output_path, source_stat, source_digest, output_digest, args):
+    """Record the source and output state that the expected JSON was generated from."""
+    output_stat = os.stat(output_path)
+    stamp = {
+        "mtime_ns": source_stat.st_mtime_ns,
+        "size": source_stat.st_size,
+        "source_digest": source_digest,
+        "mode": args.mode,
+        "core_version": _CORE_VERSION,
+        "output_digest": output_digest,
+        "output_mtime_ns": output_stat.st_mtime_ns,
+        "output_size": output_stat.st_size,
+    }
+    with open(f"{output_path}.stamp", "w", encoding="utf-8") as f:
+        json.dump(stamp, f)
+
+
+def invalidate_stamp(output_path, args):
+    """Make sure the next run regenerates an expected JSON file.
+
+    Under --incremental the stamp is replaced by a failure marker that never
+    matches, since a missing stamp would let the mtime fallback skip the stale
+    output. Otherwise any stamp is simply deleted.
+    """
+    stamp_path = f"{output_path}.stamp"
+    if args.incremental:
+        with open(stamp_path, "w", encoding="utf-8") as f:
+            json.dump({"failed": True}, f)
     else:
-        print(f"Unsupported file extension: {ext}")
-        return
+        try:
+            os.unlink(stamp_path)
+        except FileNotFoundError:
+            pass
+
+
+def stamp_matches(stamp, source_stat, args):
+    """Check whether a stamp still describes the current source file."""
+    return (
+        stamp is not None
+        and stamp.get("mtime_ns") == source_stat.st_mtime_ns
+        and stamp.get("size") == source_stat.st_size
+        and stamp.get("mode") == args.mode
+        and stamp.get("core_version") == _CORE_VERSION
+    )
 
-    # Read the file content
-    with open(file_path, "r", encoding="utf-8") as f:
-        content = f.read()
 
-    # Create a parser context
-    ctx = scopemux_core.ParserContext()
+def output_matches_stamp(output_path, output_digest, stamp):
+    """Check whether the expected JSON on disk is the one the stamp recorded.
+
+    The output file's stat must be unchanged since the stamp was written, so a
+    hand-edited expected file is never mistaken for freshly generated output.
+    """
+    if stamp is None or stamp.get("output_digest") != output_digest:
+        return False
+    output_stat = os.stat(output_path)
+    return (
+        stamp.get("output_mtime_ns") == output_stat.st_mtime_ns
+        and stamp.get("output_size") == output_stat.st_size
+    )
+
+
+def dump_json_bytes(obj):
+    """Serialize obj as 2-space indented JSON bytes, with orjson when possible.
+
+    Existing fixtures were written by json.dumps(indent=2), which escapes
+    non-ASCII characters. orjson cannot escape them, so its output is only
+    used when it is pure ASCII and therefore identical; anything else is
+    re-encoded with the stdlib.
+    """
+    if orjson is not None:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+        if data.isascii():
+            return data
+    return json.dumps(obj, indent=2).encode("ascii")
+
+
+def content_digest(data):
+    """Hash source or output bytes with blake3 when available, sha256 otherwise."""
+    if blake3 is not None:
+        return blake3.blake3(data).hexdigest()
+    return hashlib.sha256(data).hexdigest()
+
+
+def process_file(file_path, args, ctx=None):
+    """Generate or update the expected JSON for one source file.
+
+    Returns False when the file could not be parsed or a tree could not be
+    extracted, True otherwise (including files skipped as unchanged).
+    """
+    # Determine the language based on file extension
+    language = _EXT_TO_LANG.get(os.path.splitext(file_path)[1].lower())
+    if language is None:
+        print(f"Unsupported file extension: {os.path.splitext(file_path)[1]}")
+        return False
+
+    output_path = output_path_for(file_path, args)
+
+    # In incremental mode an unchanged source (same mtime and size as
+    # recorded in the stamp) is skipped before it is even read. Only stamps
+    # need the source's stat, so other runs do not pay for it.
+    source_stat = os.stat(file_path) if args.incremental else None
+    stamp = None
+    if args.incremental and not args.force and os.path.exists(output_path):
+        stamp = read_stamp(output_path)
+        if stamp_matches(stamp, source_stat, args):
+            if args.verbose:
+                print(f"Skipping unchanged {file_path}")
+            return True
+        # Expected files written without --incremental have no stamp; when
+        # updating, treat one that is newer than both its source and the
+        # loaded extension as up to date. Without a stamp the mode it was
+        # generated in is unknown, so a mode change needs --force.
+        if stamp is None and args.update and not args.review and _CORE_STAT is not None:
+            output_mtime_ns = os.stat(output_path).st_mtime_ns
+            if (
+                source_stat.st_mtime_ns <= output_mtime_ns
+                and _CORE_STAT.st_mtime_ns <= output_mtime_ns
+            ):
+                if args.verbose:
+                    print(f"Skipping {file_path} (expected file is newer)")
+                return True
+
+    # Read the raw file bytes; parse_string accepts bytes directly, so the
+    # content is never decoded to str on the Python side
+    content = Path(file_path).read_bytes()
+    # Translate newlines as text-mode reading did, so CRLF and CR sources
+    # produce the same CST content strings as before
+    if b"\r" in content:
+        content = content.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+    source_digest = None
+    if args.incremental:
+        source_digest = content_digest(content)
+        # A source that was only touched (a checkout, a copy) still hashes to
+        # the recorded digest. Refresh the stamp so the next run can skip it
+        # on stat alone, provided the expected file itself is untouched.
+        if (
+            stamp is not None
+            and stamp.get("mode") == args.mode
+            and stamp.get("core_version") == _CORE_VERSION
+            and stamp.get("source_digest") == source_digest
+            and output_matches_stamp(output_path, stamp.get("output_digest"), stamp)
+        ):
+            write_stamp(output_path, source_stat, source_digest, stamp["output_digest"], args)
+            if args.verbose:
+                print(f"Skipping unchanged {file_path} (content matches stamp)")
+            return True
 
-    ast_json = None
-    cst_json = None
+    # Create a parser context unless the caller is reusing one across files
+    if ctx is None:
+        ctx = scopemux_core.ParserContext()
 
     # Parse the file once
     try:
         parse_result = ctx.parse_string(content, file_path, language)
         if not parse_result:
             print(f"Failed to parse {file_path}")
-            return
+            return False
     except Exception as e:
         print(f"Error parsing {file_path}: {e}")
-        return
+        return False
 
-    # Extract AST if requested
-    if args.mode in ["ast", "both"]:
-        try:
-            ast_root = ctx.get_ast_root()
-            if ast_root:
-                ast_json = serialize_ast_node_to_dict(ast_root)
-                print(
-                    f"DEBUG: AST root extracted for {file_path}, type: {type(ast_root)}")
-            else:
-                print(f"No AST root found for {file_path}")
-        except Exception as e:
-            print(f"Error extracting AST for {file_path}: {e}")
+    # A plain dry run throws the output away, so once the file is known to
+    # parse there is no reason to extract and serialize the trees
+    if args.dry_run and not args.review and not args.verbose:
+        action = "update" if args.update and os.path.exists(output_path) else "write"
+        print(f"Would {action} {output_path} (dry run)")
+        return True
 
-    # Extract CST if requested
-    if args.mode in ["cst", "both"]:
+    # Extract the requested roots into the combined .expected.json payload
+    combined = {}
+    extracted = True
+    for key, get_root, serialize in extractors_for_mode(args.mode):
+        label = key.upper()
         try:
-            if hasattr(ctx, "get_cst_root"):
-                cst_root = ctx.get_cst_root()
-                if cst_root:
-                    cst_json = cst_root  # get_cst_root already returns a dictionary
+            root = get_root(ctx)
+            if root:
+                value = serialize(root)
+                if value is not None:
+                    combined[key] = value
+                if args.verbose:
                     print(
-                        f"DEBUG: CST root extracted for {file_path}, type: {type(cst_root)}")
-                else:
-                    print(f"No CST root found for {file_path}")
+                        f"DEBUG: {label} root extracted for {file_path}, type: {type(root)}")
             else:
-                print(
-                    "Warning: get_cst_root() not available in scopemux_core.ParserContext")
+                print(f"No {label} root found for {file_path}")
         except Exception as e:
-            print(f"Error extracting CST for {file_path}: {e}")
-
-    # Debug: print AST and CST output
-    print(f"DEBUG: AST for {file_path}: {repr(ast_json)}")
-    print(f"DEBUG: CST for {file_path}: {repr(cst_json)}")
-
-    # Write combined .expected.json file if either AST or CST is present
-    combined = {}
-    if ast_json is not None:
-        combined["ast"] = ast_json
-    if cst_json is not None:
-        combined["cst"] = cst_json
+            print(f"Error extracting {label} for {file_path}: {e}")
+            extracted = False
+
+    # Debug: print a truncated preview of the AST and CST output. Rendering the
+    # full trees costs a complete traversal per file, so it is verbose-only.
+    if args.verbose:
+        print(f"DEBUG: AST for {file_path}: {json.dumps(combined.get('ast'))[:200]} ...")
+        print(f"DEBUG: CST for {file_path}: {json.dumps(combined.get('cst'))[:200]} ...")
+
+    # A partial payload must not replace the fixture or be stamped, or later
+    # incremental runs would skip the file and hide the failure
+    if not extracted:
+        if not args.dry_run:
+            invalidate_stamp(output_path, args)
+        print(f"Not writing {output_path}: extraction failed")
+        return False
 
     # Add language field if available
-    if hasattr(ctx, "language"):
+    if _HAS_CTX_LANGUAGE:
         combined["language"] = ctx.language
     else:
         # Fallback: try to infer from language variable
-        lang_map = {
-            scopemux_core.LANG_C: "C",
-            scopemux_core.LANG_CPP: "C++",
-            scopemux_core.LANG_PYTHON: "Python",
-            scopemux_core.LANG_JAVASCRIPT: "JavaScript",
-            scopemux_core.LANG_TYPESCRIPT: "TypeScript",
-        }
-        combined["language"] = lang_map.get(language, "unknown")
+        combined["language"] = _LANG_TO_NAME.get(language, "unknown")
 
     # Write to .expected.json file
-    output_path = f"{file_path}.expected.json"
-    write_or_update_json(combined, output_path, args)
-    # Clean up
-    # ctx.clear()  # Removed to avoid AttributeError
+    output_digest = write_or_update_json(combined, output_path, args, stamp)
+    if output_digest is not None and args.incremental:
+        write_stamp(output_path, source_stat, source_digest, output_digest, args)
+    return True
+
+
+def output_path_for(file_path, args):
+    """Return where the expected JSON for file_path is written.
+
+    Without --output-dir it sits next to the source. With it, the source's
+    directories below the processed root are recreated under the output
+    directory.
+    """
+    if not args.output_dir:
+        return f"{file_path}.expected.json"
+    source_dir, name = os.path.split(file_path)
+    output_dir = _output_dir_for(source_dir, args.source_root, args.output_dir)
+    return os.path.join(output_dir, f"{name}.expected.json")
+
+
+@functools.lru_cache(maxsize=None)
+def _output_dir_for(source_dir, source_root, output_dir):
+    """Map a source directory to its mirror under output_dir.
+
+    Every file in a directory shares the result, so the relative-path work is
+    done once per directory rather than once per file.
+    """
+    return os.path.join(output_dir, *PurePath(source_dir).relative_to(source_root).parts)
+
+
+# Output directories already created (or confirmed to exist) during this run
+_CREATED_DIRS = set()
+
+
+def ensure_output_dir(output_path):
+    """Create the parent directory of output_path once per run."""
+    directory = os.path.dirname(output_path)
+    if directory not in _CREATED_DIRS:
+        os.makedirs(directory, exist_ok=True)
+        _CREATED_DIRS.add(directory)
+
+
+# Marks a key or list index present on only one side of a semantic diff
+_MISSING = object()
+
+
+def _brief(value, limit=80):
+    """Render a JSON value on one line, truncated for diff output."""
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= limit else f"{text[:limit]}..."
+
+
+def json_semantic_diff(old, new):
+    """Yield path-prefixed differences between two decoded JSON documents.
+
+    Lines read "- path: value" for removals, "+ path: value" for additions and
+    "~ path: old -> new" for changed values, in document order. Identical
+    subtrees are pruned with a single equality check, and an explicit stack
+    keeps deep CSTs clear of the recursion limit.
+    """
+    stack = [("", old, new)]
+    while stack:
+        path, a, b = stack.pop()
+        if a is _MISSING:
+            yield f"+ {path}: {_brief(b)}"
+        elif b is _MISSING:
+            yield f"- {path}: {_brief(a)}"
+        elif type(a) is type(b) and a == b:
+            continue
+        elif isinstance(a, dict) and isinstance(b, dict):
+            keys = list(a) + [key for key in b if key not in a]
+            stack.extend(
+                (f"{path}.{key}" if path else key, a.get(key, _MISSING), b.get(key, _MISSING))
+                for key in reversed(keys)
+            )
+        elif isinstance(a, list) and isinstance(b, list):
+            stack.extend(
+                (
+                    f"{path}[{i}]",
+                    a[i] if i < len(a) else _MISSING,
+                    b[i] if i < len(b) else _MISSING,
+                )
+                for i in reversed(range(max(len(a), len(b))))
+            )
+        else:
+            yield f"~ {path}: {_brief(a)} -> {_brief(b)}"
 
 
-# get_output_path is no longer needed for combined output
+def write_output(output_path, data):
+    """Atomically replace output_path with already-encoded output bytes.
+
+    The bytes go to a temporary file beside the target with os-level calls,
+    skipping the buffered file object, and are then moved into place with
+    os.replace(), so an interrupted run never leaves a truncated fixture. An
+    existing file's permissions carry over to its replacement.
+    """
+    try:
+        existing_mode = os.stat(output_path).st_mode
+    except FileNotFoundError:
+        existing_mode = None
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        try:
+            if existing_mode is not None:
+                os.fchmod(fd, stat.S_IMODE(existing_mode))
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
 
 
-def write_or_update_json(json_data, output_path, args):
-    # Format the JSON with indentation for readability
-    formatted_json = json.dumps(json_data, indent=2)
+def write_or_update_json(json_data, output_path, args, stamp=None):
+    """Write or update an expected JSON file.
+
+    Returns the digest of the serialized output when the file on disk matches
+    json_data afterwards, or None when it does not (dry run or error).
+    """
+    # Format the JSON once; the same bytes are hashed, compared and written
+    data = dump_json_bytes(json_data)
+    output_digest = content_digest(data)
 
     if args.update and os.path.exists(output_path):
+        # A stamp recording this exact output means there is nothing to read,
+        # diff or write
+        if output_matches_stamp(output_path, output_digest, stamp):
+            if args.verbose:
+                print(f"No changes needed for {output_path}")
+            return output_digest
+
         if args.review:
             try:
-                with open(output_path, "r", encoding="utf-8") as f:
-                    existing_json = f.read()
-
-                diff = list(
-                    difflib.unified_diff(
-                        existing_json.splitlines(),
-                        formatted_json.splitlines(),
+                existing_data = Path(output_path).read_bytes()
+
+                # Unchanged output is the common case; compare the raw bytes
+                # and skip decoding and difflib entirely
+                if existing_data == data:
+                    if args.verbose:
+                        print(f"No changes needed for {output_path}")
+                    return output_digest
+
+                # Report what changed in the data rather than line noise. An
+                # existing file that is not valid JSON gets a plain text diff.
+                # Both diffs are generators and are streamed to stdout as they
+                # are produced.
+                try:
+                    existing_json = json.loads(existing_data)
+                except ValueError:
+                    diff = difflib.unified_diff(
+                        existing_data.decode("utf-8", errors="replace").splitlines(),
+                        data.decode("utf-8").splitlines(),
                         fromfile=f"a/{os.path.basename(output_path)}",
                         tofile=f"b/{os.path.basename(output_path)}",
                         lineterm="",
                     )
-                )
+                    no_diff = None
+                else:
+                    diff = json_semantic_diff(existing_json, json_data)
+                    no_diff = "(formatting changes only)"
 
-                if diff:
+                first_line = next(diff, no_diff)
+                if first_line is not None:
                     print(f"\nDiff for {output_path}:")
-                    for line in diff:
-                        print(line)
+                    print(first_line)
+                    sys.stdout.writelines(f"{line}\n" for line in diff)
 
                     if not args.dry_run:
                         print(f"Updating {output_path}")
-                        with open(output_path, "w", encoding="utf-8") as f:
-                            f.write(formatted_json)
+                        write_output(output_path, data)
+                        return output_digest
                 else:
-                    print(f"No changes needed for {output_path}")
+                    if args.verbose:
+                        print(f"No changes needed for {output_path}")
+                    return output_digest
             except Exception as e:
                 print(f"Error comparing files: {e}")
         else:
             if not args.dry_run:
                 print(f"Updating {output_path}")
-                with open(output_path, "w", encoding="utf-8") as f:
-                    f.write(formatted_json)
+                write_output(output_path, data)
+                return output_digest
             else:
                 print(f"Would update {output_path} (dry run)")
     else:
         if not args.dry_run:
             print(f"Writing {output_path}")
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(formatted_json)
+            ensure_output_dir(output_path)
+            write_output(output_path, data)
+            return output_digest
         else:
             print(f"Would write {output_path} (dry run)")
+    return None
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
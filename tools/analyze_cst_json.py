@@ -14,19 +14,35 @@ Usage:
 """
 import sys
 import json
-from collections import Counter, deque
+from collections import Counter
 
-def walk(node, depth=0, type_counter=None, max_depth_info=None, path=None):
-    if type_counter is not None:
+def walk(root, type_counter, max_depth_info):
+    """Count node types and record the depth of and path to the deepest node.
+
+    Uses an explicit stack instead of recursion: the deep trees this tool is
+    meant to diagnose would otherwise exceed Python's recursion limit. Each
+    entry links back to its parent, so the path to the deepest node is rebuilt
+    once at the end rather than copied at every step.
+    """
+    stack = [(root, 0, None)]
+    deepest_link = None
+    while stack:
+        node, depth, link = stack.pop()
         type_counter[node.get('type', '<unknown>')] += 1
-    if max_depth_info is not None and depth > max_depth_info[0]:
-        max_depth_info[0] = depth
-        max_depth_info[1] = list(path)
-    children = node.get('children', [])
-    for idx, child in enumerate(children):
-        path.append((child.get('type', '<unknown>'), idx))
-        walk(child, depth + 1, type_counter, max_depth_info, path)
-        path.pop()
+        if depth > max_depth_info[0]:
+            max_depth_info[0] = depth
+            deepest_link = link
+        children = node.get('children', [])
+        # Push in reverse so children are visited in document order
+        for idx in range(len(children) - 1, -1, -1):
+            child = children[idx]
+            stack.append((child, depth + 1, (link, (child.get('type', '<unknown>'), idx))))
+    path = []
+    while deepest_link is not None:
+        deepest_link, step = deepest_link
+        path.append(step)
+    path.reverse()
+    max_depth_info[1] = path
 
 def main():
     if len(sys.argv) != 2:
@@ -37,7 +53,7 @@ def main():
         root = json.load(f)
     type_counter = Counter()
     max_depth_info = [0, []]  # [max_depth, path_to_deepest]
-    walk(root, 0, type_counter, max_depth_info, path=deque())
+    walk(root, type_counter, max_depth_info)
     print(f"Most common node types:")
     for node_type, count in type_counter.most_common(20):
         print(f"  {node_type}: {count}")